@@ -1,13 +1,13 @@
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
 
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
 import streamlit as st
 
-from services.database import init_db, save_snapshot, get_all_snapshots, get_latest_snapshot
+from services.database import init_db, save_snapshot, get_snapshots_bundle
 from services.prices import get_stock_prices, get_crypto_prices
 
 HOLDINGS_PATH = os.path.join(os.path.dirname(__file__), "holdings.json")
@@ -26,11 +26,17 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-def load_holdings() -> dict:
+@st.cache_data(show_spinner=False)
+def _load_holdings_cached(mtime: float) -> dict:
+    # mtime is only the cache key: save_holdings bumps it, invalidating the entry.
     with open(HOLDINGS_PATH, "r") as f:
         return json.load(f)
 
 
+def load_holdings() -> dict:
+    return _load_holdings_cached(os.path.getmtime(HOLDINGS_PATH))
+
+
 def save_holdings(holdings: dict):
     with open(HOLDINGS_PATH, "w") as f:
         json.dump(holdings, f, indent=2)
@@ -38,66 +44,52 @@ def save_holdings(holdings: dict):
 
 def compute_snapshot(holdings: dict) -> tuple[float, dict]:
     """Fetch all prices, compute total net worth and breakdown."""
-    breakdown = {
-        "stocks": {},
-        "etfs": {},
-        "crypto": {},
-        "cash": {},
-        "category_totals": {},
-    }
-
-    # Stock prices
     stock_tickers = [h["ticker"] for h in holdings.get("stocks", [])]
     etf_tickers = [h["ticker"] for h in holdings.get("etfs", [])]
-    all_tickers = stock_tickers + etf_tickers
-    prices = get_stock_prices(all_tickers) if all_tickers else {}
-
-    stocks_total = 0.0
-    for h in holdings.get("stocks", []):
-        ticker = h["ticker"]
-        price = prices.get(ticker, 0.0)
-        value = round(price * h["shares"], 2)
-        breakdown["stocks"][ticker] = value
-        stocks_total += value
-
-    etfs_total = 0.0
-    for h in holdings.get("etfs", []):
-        ticker = h["ticker"]
-        price = prices.get(ticker, 0.0)
-        value = round(price * h["shares"], 2)
-        breakdown["etfs"][ticker] = value
-        etfs_total += value
-
-    # Crypto prices
-    crypto_ids = [h["id"] for h in holdings.get("crypto", [])]
-    crypto_prices = get_crypto_prices(crypto_ids) if crypto_ids else {}
-
-    crypto_total = 0.0
-    for h in holdings.get("crypto", []):
-        price = crypto_prices.get(h["id"], 0.0)
-        value = round(price * h["amount"], 2)
-        breakdown["crypto"][h["symbol"]] = value
-        crypto_total += value
-
-    # Cash (manual entries from config)
-    cash_total = 0.0
-    for h in holdings.get("cash", []):
-        label = h["label"]
-        amount = h["amount"]
-        breakdown["cash"][label] = amount
-        cash_total += amount
-
-    breakdown["category_totals"] = {
-        "stocks": round(stocks_total, 2),
-        "etfs": round(etfs_total, 2),
-        "crypto": round(crypto_total, 2),
-        "cash": round(cash_total, 2),
+    all_tickers = tuple(sorted(set(stock_tickers + etf_tickers)))
+    crypto_ids = tuple(sorted({h["id"] for h in holdings.get("crypto", [])}))
+
+    # Fetch stock and crypto prices concurrently; both helpers swallow
+    # their own errors, so one source failing doesn't affect the other.
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        stock_future = ex.submit(get_stock_prices, all_tickers)
+        crypto_future = ex.submit(get_crypto_prices, crypto_ids)
+        prices = stock_future.result()
+        crypto_prices = crypto_future.result()
+
+    # (key, value) per holding row. Totals sum every row, so repeated tickers
+    # or labels (e.g. two lots of the same stock) all count, while the
+    # breakdown dicts keep one entry per key as before.
+    rows = {
+        "stocks": [(h["ticker"], round(prices.get(h["ticker"], 0.0) * h["shares"], 2)) for h in holdings.get("stocks", [])],
+        "etfs": [(h["ticker"], round(prices.get(h["ticker"], 0.0) * h["shares"], 2)) for h in holdings.get("etfs", [])],
+        "crypto": [(h["symbol"], round(crypto_prices.get(h["id"], 0.0) * h["amount"], 2)) for h in holdings.get("crypto", [])],
+        # Cash (manual entries from config)
+        "cash": [(h["label"], h["amount"]) for h in holdings.get("cash", [])],
     }
+    breakdown = {category: dict(pairs) for category, pairs in rows.items()}
+    totals = {category: sum((value for _, value in pairs), 0.0) for category, pairs in rows.items()}
+    breakdown["category_totals"] = {category: round(t, 2) for category, t in totals.items()}
 
-    total = round(stocks_total + etfs_total + crypto_total + cash_total, 2)
+    total = round(sum(totals.values()), 2)
     return total, breakdown
 
 
+MONEY_FORMAT = "${:,.2f}"
+
+
+def holdings_table(entries: list[dict], values: dict, key: str, qty: str, key_label: str, qty_label: str):
+    """Build a detail table (label, quantity, price, value) for one asset class."""
+    df = pd.DataFrame(entries, columns=[key, qty])
+    df["Value"] = df[key].map(values).fillna(0.0)
+    df["Price"] = (df["Value"] / df[qty]).where(df[qty] != 0, 0.0).round(2)
+    df = df.rename(columns={key: key_label, qty: qty_label})[[key_label, qty_label, "Price", "Value"]]
+    # Only the money columns are formatted; quantities stay numeric so they display as entered.
+    df["Price"] = df["Price"].map(MONEY_FORMAT.format)
+    df["Value"] = df["Value"].map(MONEY_FORMAT.format)
+    return df
+
+
 # --- Sidebar: Holdings Editor ---
 with st.sidebar:
     st.header("Manage Holdings")
@@ -216,8 +208,7 @@ if st.button("🔄 Refresh Prices", type="primary"):
     st.success("Snapshot saved!")
 
 # --- Load latest data ---
-latest = get_latest_snapshot()
-all_snapshots = get_all_snapshots()
+series, latest = get_snapshots_bundle()
 
 if latest is None:
     st.info("No data yet. Click **Refresh Prices** to fetch your first snapshot.")
@@ -230,8 +221,8 @@ cat_totals = breakdown.get("category_totals", {})
 # --- Compute daily change ---
 daily_change = 0.0
 daily_pct = 0.0
-if len(all_snapshots) >= 2:
-    prev = all_snapshots[-2]["total_value"]
+if len(series) >= 2:
+    prev = series[-2][1]
     daily_change = total_value - prev
     daily_pct = (daily_change / prev * 100) if prev != 0 else 0.0
 
@@ -241,12 +232,12 @@ with col1:
     st.metric(
         label="Net Worth",
         value=f"${total_value:,.2f}",
-        delta=f"${daily_change:+,.2f} ({daily_pct:+.2f}%)" if len(all_snapshots) >= 2 else None,
+        delta=f"${daily_change:+,.2f} ({daily_pct:+.2f}%)" if len(series) >= 2 else None,
     )
 with col2:
     st.metric("Latest Snapshot", latest["date"])
 with col3:
-    st.metric("Total Snapshots", len(all_snapshots))
+    st.metric("Total Snapshots", len(series))
 
 # --- Category totals ---
 st.subheader("Category Breakdown")
@@ -263,16 +254,18 @@ for col, (name, val) in zip(cat_cols, categories):
 # --- Charts ---
 st.subheader("Net Worth Over Time")
 
-if len(all_snapshots) >= 2:
-    df = pd.DataFrame(all_snapshots)
-    df["date"] = pd.to_datetime(df["date"])
-    fig_line = px.line(
-        df, x="date", y="total_value",
-        labels={"date": "Date", "total_value": "Net Worth ($)"},
-    )
-    fig_line.update_traces(line_color="#0052FF", line_width=3)
+if len(series) >= 2:
+    dates, values = zip(*series)
+    fig_line = go.Figure(go.Scatter(
+        x=list(dates),
+        y=list(values),
+        mode="lines",
+        line=dict(color="#0052FF", width=3),
+    ))
     fig_line.update_layout(
         hovermode="x unified",
+        xaxis_title="Date",
+        yaxis_title="Net Worth ($)",
         yaxis_tickprefix="$",
         yaxis_tickformat=",.0f",
     )
@@ -285,9 +278,10 @@ st.subheader("Allocation")
 
 pie_data = {k: v for k, v in cat_totals.items() if v > 0}
 if pie_data:
+    labels, values = zip(*pie_data.items())
     fig_pie = go.Figure(data=[go.Pie(
-        labels=list(pie_data.keys()),
-        values=list(pie_data.values()),
+        labels=list(labels),
+        values=list(values),
         hole=0.4,
         textinfo="label+percent",
         marker=dict(colors=["#0052FF", "#00C49F", "#FF8042", "#00B4D8"]),
@@ -303,40 +297,24 @@ holdings = load_holdings()
 # Stocks
 if breakdown.get("stocks"):
     st.markdown("**Stocks**")
-    rows = []
-    for h in holdings.get("stocks", []):
-        ticker = h["ticker"]
-        value = breakdown["stocks"].get(ticker, 0)
-        price = round(value / h["shares"], 2) if h["shares"] else 0
-        rows.append({"Ticker": ticker, "Shares": h["shares"], "Price": f"${price:,.2f}", "Value": f"${value:,.2f}"})
-    st.dataframe(pd.DataFrame(rows), width="stretch", hide_index=True)
+    df = holdings_table(holdings.get("stocks", []), breakdown["stocks"], "ticker", "shares", "Ticker", "Shares")
+    st.dataframe(df, width="stretch", hide_index=True)
 
 # ETFs
 if breakdown.get("etfs"):
     st.markdown("**ETFs**")
-    rows = []
-    for h in holdings.get("etfs", []):
-        ticker = h["ticker"]
-        value = breakdown["etfs"].get(ticker, 0)
-        price = round(value / h["shares"], 2) if h["shares"] else 0
-        rows.append({"Ticker": ticker, "Shares": h["shares"], "Price": f"${price:,.2f}", "Value": f"${value:,.2f}"})
-    st.dataframe(pd.DataFrame(rows), width="stretch", hide_index=True)
+    df = holdings_table(holdings.get("etfs", []), breakdown["etfs"], "ticker", "shares", "Ticker", "Shares")
+    st.dataframe(df, width="stretch", hide_index=True)
 
 # Crypto
 if breakdown.get("crypto"):
     st.markdown("**Crypto**")
-    rows = []
-    for h in holdings.get("crypto", []):
-        symbol = h["symbol"]
-        value = breakdown["crypto"].get(symbol, 0)
-        price = round(value / h["amount"], 2) if h["amount"] else 0
-        rows.append({"Asset": symbol, "Amount": h["amount"], "Price": f"${price:,.2f}", "Value": f"${value:,.2f}"})
-    st.dataframe(pd.DataFrame(rows), width="stretch", hide_index=True)
+    df = holdings_table(holdings.get("crypto", []), breakdown["crypto"], "symbol", "amount", "Asset", "Amount")
+    st.dataframe(df, width="stretch", hide_index=True)
 
 # Cash
 if breakdown.get("cash"):
     st.markdown("**Cash**")
-    rows = []
-    for label, amount in breakdown["cash"].items():
-        rows.append({"Account": label, "Balance": f"${amount:,.2f}"})
-    st.dataframe(pd.DataFrame(rows), width="stretch", hide_index=True)
+    df = pd.DataFrame({"Account": list(breakdown["cash"]), "Balance": list(breakdown["cash"].values())})
+    df["Balance"] = df["Balance"].map(MONEY_FORMAT.format)
+    st.dataframe(df, width="stretch", hide_index=True)
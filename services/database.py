@@ -1,7 +1,8 @@
 from __future__ import annotations
-import json
+import bisect
 import base64
 import os
+import orjson
 import requests
 import streamlit as st
 
@@ -9,6 +10,12 @@ GITHUB_REPO = "bkpgeneralholdings/networth-tracker"
 SNAPSHOTS_FILE = "snapshots.json"
 GITHUB_API = "https://api.github.com"
 
+# Shared session so the GET/PUT pair and later reruns reuse one keep-alive connection.
+_session = requests.Session()
+
+# (etag, snapshots_list, sha) from the last 200 response for snapshots.json.
+_last_fetch: tuple[str, list, str] | None = None
+
 
 def _get_token() -> str:
     try:
@@ -25,28 +32,47 @@ def _get_headers() -> dict:
 
 
 def _fetch_file() -> tuple[list, str | None]:
-    """Fetch snapshots.json from GitHub. Returns (snapshots_list, sha)."""
+    """Fetch snapshots.json from GitHub. Returns (snapshots_list, sha).
+
+    Sends If-None-Match with the last ETag seen, so an unchanged file comes
+    back as a bodiless 304 and the previously parsed list is reused.
+    """
+    global _last_fetch
     url = f"{GITHUB_API}/repos/{GITHUB_REPO}/contents/{SNAPSHOTS_FILE}"
-    resp = requests.get(url, headers=_get_headers())
+    headers = _get_headers()
+    cached = _last_fetch
+    if cached:
+        headers["If-None-Match"] = cached[0]
+    resp = _session.get(url, headers=headers)
+    if resp.status_code == 304 and cached:
+        return list(cached[1]), cached[2]
     if resp.status_code == 404:
         return [], None
     resp.raise_for_status()
     data = resp.json()
-    content = base64.b64decode(data["content"]).decode("utf-8")
-    return json.loads(content), data["sha"]
+    snapshots, sha = orjson.loads(base64.b64decode(data["content"])), data["sha"]
+    etag = resp.headers.get("ETag")
+    _last_fetch = (etag, snapshots, sha) if etag else None
+    return list(snapshots), sha
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _cached_fetch() -> tuple[list, str | None]:
+    """Cached _fetch_file for the read path. Cleared after every write."""
+    return _fetch_file()
 
 
 def _write_file(snapshots: list, sha: str | None):
     """Write snapshots list to GitHub."""
     url = f"{GITHUB_API}/repos/{GITHUB_REPO}/contents/{SNAPSHOTS_FILE}"
-    content = base64.b64encode(json.dumps(snapshots, indent=2).encode()).decode()
+    content = base64.b64encode(orjson.dumps(snapshots)).decode()
     payload = {
         "message": f"Update snapshots",
         "content": content,
     }
     if sha:
         payload["sha"] = sha
-    resp = requests.put(url, headers=_get_headers(), json=payload)
+    resp = _session.put(url, headers=_get_headers(), json=payload)
     resp.raise_for_status()
 
 
@@ -58,16 +84,20 @@ def init_db():
 def save_snapshot(date: str, total_value: float, breakdown: dict):
     """Upsert a snapshot for the given date into GitHub."""
     for attempt in range(3):
-        snapshots, sha = _fetch_file()
-        snapshots = [s for s in snapshots if s["date"] != date]
-        snapshots.append({
+        current, sha = _fetch_file()
+        snapshots = [s for s in current if s["date"] != date]
+        # The file is always written in date order, so insert in place.
+        bisect.insort(snapshots, {
             "date": date,
             "total_value": total_value,
             "breakdown": breakdown,
-        })
-        snapshots.sort(key=lambda s: s["date"])
+        }, key=lambda s: s["date"])
+        if snapshots == current:
+            # Today's snapshot is unchanged; skip the PUT and the empty commit.
+            return
         try:
             _write_file(snapshots, sha)
+            _cached_fetch.clear()
             return
         except requests.HTTPError as e:
             if e.response.status_code == 409 and attempt < 2:
@@ -76,14 +106,13 @@ def save_snapshot(date: str, total_value: float, breakdown: dict):
 
 
 def get_all_snapshots() -> list[dict]:
-    """Return all snapshots ordered by date."""
-    snapshots, _ = _fetch_file()
-    return sorted(snapshots, key=lambda s: s["date"])
+    """Return all snapshots ordered by date (save_snapshot keeps the file sorted)."""
+    snapshots, _ = _cached_fetch()
+    return snapshots
 
 
-def get_latest_snapshot() -> dict | None:
-    """Return the most recent snapshot, or None."""
-    snapshots, _ = _fetch_file()
-    if not snapshots:
-        return None
-    return sorted(snapshots, key=lambda s: s["date"])[-1]
+def get_snapshots_bundle() -> tuple[list[tuple[str, float]], dict | None]:
+    """Return ((date, total_value) series, latest snapshot or None) from one fetch."""
+    snapshots, _ = _cached_fetch()
+    series = [(s["date"], s["total_value"]) for s in snapshots]
+    return series, (snapshots[-1] if snapshots else None)
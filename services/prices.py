@@ -1,44 +1,85 @@
-import yfinance as yf
-from pycoingecko import CoinGeckoAPI
+import streamlit as st
 
+PRICE_TTL = 600  # seconds
 
-def get_stock_prices(tickers: list[str]) -> dict[str, float]:
+
+@st.cache_resource(show_spinner=False)
+def _get_cg():
+    """Shared CoinGecko client, so its requests.Session keeps connections alive across reruns."""
+    from pycoingecko import CoinGeckoAPI  # deferred: only needed on refresh
+
+    return CoinGeckoAPI()
+
+
+class _MissingPrices(Exception):
+    """Raised inside a cached fetch so st.cache_data doesn't store a partial result."""
+
+    def __init__(self, prices: dict[str, float], missing: list[str]):
+        super().__init__(f"no price for {', '.join(missing)}")
+        self.prices = prices
+
+
+def _require_all(prices: dict[str, float], keys: tuple[str, ...]) -> dict[str, float]:
+    missing = [k for k in keys if k not in prices]
+    if missing:
+        raise _MissingPrices(prices, missing)
+    return prices
+
+
+# The cached fetchers raise on any failure or missing symbol, so only complete
+# results are cached; a transient 429 is retried on the next Refresh.
+@st.cache_data(ttl=PRICE_TTL, show_spinner=False)
+def _fetch_stock_prices(tickers: tuple[str, ...]) -> dict[str, float]:
+    import yfinance as yf  # deferred: heavy import, only needed on refresh
+
+    prices = {}
+    data = yf.download(list(tickers), period="1d", progress=False, threads=True)
+    if not data.empty:
+        close = data["Close"]
+        if not hasattr(close, "columns"):
+            # Older yfinance returns a Series for a single ticker
+            close = close.to_frame(tickers[0])
+        for ticker in tickers:
+            if ticker in close.columns:
+                price = close[ticker].iloc[-1]
+                if price == price:  # not NaN
+                    prices[ticker] = round(float(price), 2)
+    return _require_all(prices, tickers)
+
+
+@st.cache_data(ttl=PRICE_TTL, show_spinner=False)
+def _fetch_crypto_prices(ids: tuple[str, ...]) -> dict[str, float]:
+    prices = {}
+    data = _get_cg().get_price(ids=list(ids), vs_currencies="usd")
+    for coin_id, price_data in data.items():
+        if "usd" in price_data:
+            prices[coin_id] = round(float(price_data["usd"]), 2)
+    return _require_all(prices, ids)
+
+
+def get_stock_prices(tickers: tuple[str, ...]) -> dict[str, float]:
     """Batch-fetch current prices for stocks/ETFs via yfinance."""
     if not tickers:
         return {}
-    prices = {}
     try:
-        data = yf.download(tickers, period="1d", progress=False)
-        if data.empty:
-            return prices
-        close = data["Close"]
-        if len(tickers) == 1:
-            # yfinance returns a Series for a single ticker
-            price = close.iloc[-1]
-            if price == price:  # not NaN
-                prices[tickers[0]] = round(float(price), 2)
-        else:
-            for ticker in tickers:
-                if ticker in close.columns:
-                    price = close[ticker].iloc[-1]
-                    if price == price:  # not NaN
-                        prices[ticker] = round(float(price), 2)
+        return _fetch_stock_prices(tickers)
+    except _MissingPrices as e:
+        print(f"Error fetching stock prices: {e}")
+        return e.prices
     except Exception as e:
         print(f"Error fetching stock prices: {e}")
-    return prices
+        return {}
 
 
-def get_crypto_prices(ids: list[str]) -> dict[str, float]:
+def get_crypto_prices(ids: tuple[str, ...]) -> dict[str, float]:
     """Fetch current USD prices for crypto assets via CoinGecko."""
     if not ids:
         return {}
-    prices = {}
     try:
-        cg = CoinGeckoAPI()
-        data = cg.get_price(ids=ids, vs_currencies="usd")
-        for coin_id, price_data in data.items():
-            if "usd" in price_data:
-                prices[coin_id] = round(float(price_data["usd"]), 2)
+        return _fetch_crypto_prices(ids)
+    except _MissingPrices as e:
+        print(f"Error fetching crypto prices: {e}")
+        return e.prices
     except Exception as e:
         print(f"Error fetching crypto prices: {e}")
-    return prices
+        return {}